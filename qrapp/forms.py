@@ -6,5 +6,18 @@ class QRCodeForm(forms.Form):
     border = forms.IntegerField(min_value=0, initial=4, label="Border")
     fill_color = forms.CharField(max_length=7, initial="#000000", label="Fill Color")
     back_color = forms.CharField(max_length=7, initial="#FFFFFF", label="Background Color")
+    output_format = forms.ChoiceField(
+        choices=[("png", "PNG"), ("svg", "SVG")],
+        required=False,
+        initial="png",
+        label="Output Format",
+    )
     transparent_background = forms.BooleanField(required=False, label="Transparent Background")
-    is_google_drive_link = forms.BooleanField(required=False, label="Is this a Google Drive link?")
\ No newline at end of file
+    is_google_drive_link = forms.BooleanField(required=False, label="Is this a Google Drive link?")
+    mask_pattern = forms.IntegerField(
+        required=False,
+        min_value=0,
+        max_value=7,
+        label="Mask Pattern (optional, faster)",
+        help_text="Leave blank to pick the best mask; setting one skips the search over all 8.",
+    )
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+Lightweight writers that turn a QR module matrix straight into image data,
+without drawing each module through qrcode's image factories.
+"""
+import re
+import struct
+import zlib
+from xml.sax.saxutils import quoteattr
+
+from PIL import Image, ImageColor
+
+_HEX_COLOR_RE = re.compile(r"#[0-9a-fA-F]{6}")
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def parse_hex_color(color):
+    """
+    Return the RGB bytes of a '#RRGGBB' colour, or None for any other value.
+    """
+    if color is None or not _HEX_COLOR_RE.fullmatch(color):
+        return None
+    return bytes.fromhex(color[1:])
+
+
+def _write_chunk(stream, tag, data):
+    stream.write(struct.pack(">I", len(data)))
+    stream.write(tag)
+    stream.write(data)
+    stream.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag))))
+
+
+def write_png(stream, matrix, box_size, fill_rgb, back_rgb=None):
+    """
+    Write a QR module matrix to stream as a 1-bit palette PNG.
+
+    matrix is a list of rows of booleans (True for dark modules) that already
+    includes the border, as returned by QRCode.get_matrix(). Each module is
+    drawn as a box_size square. A back_rgb of None makes the background
+    transparent.
+    """
+    width = len(matrix) * box_size
+    row_bytes = (width + 7) // 8
+    dark, light = "1" * box_size, "0" * box_size
+    scanlines = bytearray()
+    for row in matrix:
+        # Let int() do the bit packing in C instead of shifting pixel by pixel
+        bits = "".join([dark if module else light for module in row]).ljust(row_bytes * 8, "0")
+        line = b"\x00" + int(bits, 2).to_bytes(row_bytes, "big")  # filter type 0 (None)
+        # Every pixel row within a module row is identical
+        scanlines += line * box_size
+
+    stream.write(_PNG_SIGNATURE)
+    # 1-bit depth, colour type 3 (palette), default compression/filter, no interlace
+    _write_chunk(stream, b"IHDR", struct.pack(">IIBBBBB", width, width, 1, 3, 0, 0, 0))
+    _write_chunk(stream, b"PLTE", (back_rgb or b"\xff\xff\xff") + fill_rgb)
+    if back_rgb is None:
+        # Palette index 0 (background) is fully transparent, index 1 stays opaque
+        _write_chunk(stream, b"tRNS", b"\x00")
+    _write_chunk(stream, b"IDAT", zlib.compress(scanlines, 1))
+    _write_chunk(stream, b"IEND", b"")
+
+
+def write_pil_png(stream, matrix, box_size, fill_color, back_color=None):
+    """
+    Write a QR module matrix to stream as a PNG using PIL.
+
+    Used for colours write_png() cannot parse, such as CSS colour names.
+    The matrix becomes a two-colour palette image at one pixel per module and
+    is scaled up with a nearest-neighbour resize, so no module is drawn
+    individually in Python.
+    """
+    count = len(matrix)
+    img = Image.frombytes("P", (count, count), bytes(module for row in matrix for module in row))
+    img.putpalette(ImageColor.getrgb(back_color or "white")[:3] + ImageColor.getrgb(fill_color)[:3])
+    img = img.resize((count * box_size, count * box_size), Image.Resampling.NEAREST)
+    options = {"transparency": 0} if back_color is None else {}
+    # PIL writes a two-entry palette at 1 bpp; QR codes barely compress better past level 1
+    img.save(stream, format="PNG", compress_level=1, **options)
+
+
+def render_svg(matrix, box_size, fill_color, back_color=None):
+    """
+    Return SVG markup for a QR module matrix.
+
+    Dark modules are merged into one path of horizontal runs, drawn on a
+    viewBox measured in modules and scaled to box_size pixels per module.
+    Colours may be any CSS colour; a back_color of None leaves the
+    background transparent.
+    """
+    count = len(matrix)
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < count:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < count and row[x]:
+                x += 1
+            path.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+    pixels = count * box_size
+    background = ""
+    if back_color is not None:
+        background = f'<rect width="100%" height="100%" fill={quoteattr(back_color)}/>'
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {count} {count}" shape-rendering="crispEdges">'
+        f'{background}<path fill={quoteattr(fill_color)} d="{"".join(path)}"/></svg>'
+    )
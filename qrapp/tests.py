@@ -1,3 +1,243 @@
+import re
+from io import BytesIO
+from unittest import mock
+from urllib.parse import unquote
+from xml.etree import ElementTree
+
 from django.test import TestCase
+from django.urls import reverse
+from PIL import Image
+
+from .forms import QRCodeForm
+from .render import parse_hex_color, render_svg, write_pil_png, write_png
+from .views import modify_google_drive_url, new_qr_code
+
+
+def make_matrix(data="https://example.com", border=4):
+    qr = new_qr_code(1, border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def png_pixels(png, box_size, fill=(0, 0, 0)):
+    """
+    Decode a PNG and sample one pixel per module, True where it is the fill colour.
+    """
+    img = Image.open(BytesIO(png))
+    img.load()
+    rgba = img.convert("RGBA")
+    width = img.size[0] // box_size
+    return img, [
+        [rgba.getpixel((x * box_size, y * box_size))[:3] == fill for x in range(width)]
+        for y in range(width)
+    ]
+
+
+class ModifyGoogleDriveUrlTests(TestCase):
+    SHARE_URL = "https://drive.google.com/file/d/1AbC-dEf_2/view?usp=sharing"
+    DOWNLOAD_URL = "https://drive.google.com/uc?export=download&id=1AbC-dEf_2"
+
+    def test_sharing_url_becomes_download_link(self):
+        self.assertEqual(modify_google_drive_url(self.SHARE_URL), self.DOWNLOAD_URL)
+
+    def test_sharing_url_after_other_text(self):
+        self.assertEqual(
+            modify_google_drive_url(f"Slides: {self.SHARE_URL}"),
+            f"Slides: {self.DOWNLOAD_URL}",
+        )
+
+    def test_other_data_unchanged(self):
+        for data in (
+            "https://example.com/file/d/1AbC/view?usp=sharing",
+            "https://drive.google.com/drive/folders/1AbC",
+            "plain text",
+        ):
+            self.assertEqual(modify_google_drive_url(data), data)
+
+
+class MaskPatternTests(TestCase):
+    def test_mask_pattern_reaches_qrcode(self):
+        qr = new_qr_code(1, 4, 3)
+        qr.add_data("https://example.com")
+        qr.make(fit=True)
+        self.assertEqual(qr.mask_pattern, 3)
+        # The automatically chosen mask for this data is not 3
+        self.assertNotEqual(qr.get_matrix(), make_matrix("https://example.com"))
+
+    def test_form_rejects_out_of_range_mask(self):
+        form = QRCodeForm({
+            "data": "https://example.com",
+            "size": 10,
+            "border": 4,
+            "fill_color": "#000000",
+            "back_color": "#FFFFFF",
+            "mask_pattern": 8,
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn("mask_pattern", form.errors)
+
+
+class ParseHexColorTests(TestCase):
+    def test_accepts_rrggbb(self):
+        self.assertEqual(parse_hex_color("#00FF7f"), b"\x00\xff\x7f")
+
+    def test_rejects_other_values(self):
+        for color in ("#FFF", "white", "red", "00FF7F", "#00FF7F0", None):
+            self.assertIsNone(parse_hex_color(color), color)
+
+
+class WritePngTests(TestCase):
+    def render(self, matrix, box_size, back_rgb=b"\xff\xff\xff"):
+        stream = BytesIO()
+        write_png(stream, matrix, box_size, b"\x00\x00\x00", back_rgb)
+        return stream.getvalue()
+
+    def test_matches_matrix(self):
+        matrix = make_matrix()
+        img, pixels = png_pixels(self.render(matrix, 3), 3)
+        self.assertEqual(img.size, (len(matrix) * 3, len(matrix) * 3))
+        self.assertEqual(pixels, matrix)
+
+    def test_width_not_multiple_of_eight(self):
+        # Version 1 without a border is 21 modules, so each row ends mid-byte
+        matrix = make_matrix("hi", border=0)
+        self.assertEqual(len(matrix), 21)
+        img, pixels = png_pixels(self.render(matrix, 1), 1)
+        self.assertEqual(img.size, (21, 21))
+        self.assertEqual(pixels, matrix)
+
+    def test_transparent_background(self):
+        matrix = make_matrix()
+        png = self.render(matrix, 2, back_rgb=None)
+        self.assertIn(b"tRNS", png)
+        img = Image.open(BytesIO(png)).convert("RGBA")
+        for y, row in enumerate(matrix):
+            for x, module in enumerate(row):
+                alpha = img.getpixel((x * 2, y * 2))[3]
+                self.assertEqual(alpha, 255 if module else 0)
+
+    def test_opaque_background_has_no_trns(self):
+        self.assertNotIn(b"tRNS", self.render(make_matrix(), 1))
+
+
+class WritePilPngTests(TestCase):
+    def render(self, matrix, box_size, fill_color, back_color):
+        stream = BytesIO()
+        write_pil_png(stream, matrix, box_size, fill_color, back_color)
+        return stream.getvalue()
+
+    def test_named_colours_match_matrix(self):
+        matrix = make_matrix()
+        img, pixels = png_pixels(self.render(matrix, 3, "red", "white"), 3, fill=(255, 0, 0))
+        self.assertEqual(img.size, (len(matrix) * 3, len(matrix) * 3))
+        self.assertEqual(pixels, matrix)
+
+    def test_short_hex_matches_matrix(self):
+        matrix = make_matrix()
+        _, pixels = png_pixels(self.render(matrix, 2, "#000", "#fff"), 2)
+        self.assertEqual(pixels, matrix)
+
+    def test_short_hex_takes_pil_path(self):
+        with mock.patch("qrapp.views.write_pil_png", wraps=write_pil_png) as pil_png, \
+                mock.patch("qrapp.views.write_png", wraps=write_png) as direct_png:
+            response = self.client.post(reverse("generate_qr"), {
+                "data": "https://example.com",
+                "size": 2,
+                "border": 4,
+                "fill_color": "#000",
+                "back_color": "#fff",
+            })
+        self.assertEqual(response.status_code, 200)
+        pil_png.assert_called_once()
+        direct_png.assert_not_called()
+
+    def test_transparent_background(self):
+        matrix = make_matrix()
+        img = Image.open(BytesIO(self.render(matrix, 2, "red", None))).convert("RGBA")
+        for y, row in enumerate(matrix):
+            for x, module in enumerate(row):
+                alpha = img.getpixel((x * 2, y * 2))[3]
+                self.assertEqual(alpha, 255 if module else 0)
+
+
+class RenderSvgTests(TestCase):
+    SVG_NS = "{http://www.w3.org/2000/svg}"
+
+    def parse(self, svg):
+        root = ElementTree.fromstring(svg)
+        return root, root.find(f"{self.SVG_NS}path")
+
+    def test_path_matches_matrix(self):
+        matrix = make_matrix()
+        root, path = self.parse(render_svg(matrix, 10, "#000000", "#FFFFFF"))
+        count = len(matrix)
+        self.assertEqual(root.get("width"), str(count * 10))
+        self.assertEqual(root.get("viewBox"), f"0 0 {count} {count}")
+        grid = [[False] * count for _ in range(count)]
+        run_re = r"M(\d+) (\d+)h(\d+)v1h-\3z"
+        self.assertEqual(re.sub(run_re, "", path.get("d")), "")
+        for x, y, run in re.findall(run_re, path.get("d")):
+            for dx in range(int(run)):
+                grid[int(y)][int(x) + dx] = True
+        self.assertEqual(grid, matrix)
+
+    def test_colours_are_escaped(self):
+        root, path = self.parse(render_svg(make_matrix(), 1, "'\"><x", "a&b"))
+        self.assertEqual(path.get("fill"), "'\"><x")
+        self.assertEqual(root.find(f"{self.SVG_NS}rect").get("fill"), "a&b")
+        self.assertIsNone(root.find(f"{self.SVG_NS}x"))
+
+    def test_transparent_background_has_no_rect(self):
+        root, _ = self.parse(render_svg(make_matrix(), 1, "#000000"))
+        self.assertIsNone(root.find(f"{self.SVG_NS}rect"))
+
+
+class QRCodeRequestTests(TestCase):
+    def test_post_without_new_fields_returns_png(self):
+        # The field set the form accepted before output_format and mask_pattern existed
+        response = self.client.post(reverse("generate_qr"), {
+            "data": "https://example.com",
+            "size": 10,
+            "border": 4,
+            "fill_color": "#000000",
+            "back_color": "#FFFFFF",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["qr_code_data"].startswith("data:image/png;base64,"))
+
+    def test_svg_output(self):
+        response = self.client.post(reverse("generate_qr"), {
+            "data": "https://example.com",
+            "size": 10,
+            "border": 4,
+            "fill_color": "#000000",
+            "back_color": "#FFFFFF",
+            "output_format": "svg",
+        })
+        self.assertEqual(response.status_code, 200)
+        prefix = "data:image/svg+xml;charset=utf-8,"
+        qr_code_data = response.context["qr_code_data"]
+        self.assertTrue(qr_code_data.startswith(prefix))
+        root = ElementTree.fromstring(unquote(qr_code_data[len(prefix):]))
+        self.assertEqual(root.tag, f"{RenderSvgTests.SVG_NS}svg")
+        self.assertIsNotNone(root.find(f"{RenderSvgTests.SVG_NS}path"))
+
+    def test_google_drive_link_is_rewritten(self):
+        def qr_code_data(data, **extra):
+            response = self.client.post(reverse("generate_qr"), {
+                "data": data,
+                "size": 2,
+                "border": 4,
+                "fill_color": "#000000",
+                "back_color": "#FFFFFF",
+                **extra,
+            })
+            self.assertEqual(response.status_code, 200)
+            return response.context["qr_code_data"]
 
-# Create your tests here.
+        share_url = ModifyGoogleDriveUrlTests.SHARE_URL
+        download_url = ModifyGoogleDriveUrlTests.DOWNLOAD_URL
+        rewritten = qr_code_data(share_url, is_google_drive_link="on")
+        self.assertEqual(rewritten, qr_code_data(download_url))
+        self.assertNotEqual(rewritten, qr_code_data(share_url))
@@ -1,21 +1,62 @@
-import base64
 from django.http import HttpResponse
 from django.shortcuts import render
 from .forms import QRCodeForm
+from .render import parse_hex_color, render_svg, write_pil_png, write_png
 from io import BytesIO
+import pybase64
 import qrcode
 import re 
+from urllib.parse import quote
+
+# Pattern for Google Drive sharing URLs and its direct download replacement
+_GDRIVE_RE = re.compile(r"https://drive\.google\.com/file/d/(.+?)/view\?usp=sharing")
+_GDRIVE_SUB = r"https://drive.google.com/uc?export=download&id=\1"
+_GDRIVE_PREFIX = "https://drive.google.com/file/d/"
 
 
 def modify_google_drive_url(url):
     """
     Transform the Google Drive sharing URL to a direct download link.
     """
-    # Pattern for Google Drive sharing URLs
-    pattern = r"https://drive\.google\.com/file/d/(.+?)/view\?usp=sharing"
-    replacement_pattern = r"https://drive\.google\.com/uc?export=download&id=\1"
-    return re.sub(pattern, replacement_pattern, url)
+    # Cheap literal check so non-Drive data never enters the regex engine
+    if _GDRIVE_PREFIX not in url:
+        return url
+    return _GDRIVE_RE.sub(_GDRIVE_SUB, url)
+
 
+def new_qr_code(size, border, mask_pattern=None):
+    """
+    Build a fresh QRCode with the settings shared by every request.
+    """
+    return qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=size,
+        border=border,
+        mask_pattern=mask_pattern,
+    )
+
+
+def render_png_data_uri(qr, size, fill_color, back_color):
+    """
+    Render a made QRCode as a base64 PNG data URI.
+    """
+    # Save QR code to a BytesIO object
+    img_bytes = BytesIO()
+    fill_rgb = parse_hex_color(fill_color)
+    back_rgb = parse_hex_color(back_color)
+    if fill_rgb is not None and (back_rgb is not None or back_color is None):
+        # Plain hex colours: write a 1-bit palette PNG without going through PIL
+        write_png(img_bytes, qr.get_matrix(), size, fill_rgb, back_rgb)
+    else:
+        write_pil_png(img_bytes, qr.get_matrix(), size, fill_color, back_color)
+    # Instead of returning a downloadable response, embed the image in base64.
+    # Encode straight from the buffer to avoid copying the PNG out with getvalue()
+    with img_bytes.getbuffer() as png_view:
+        # Build the data URI as bytes so the encoded image is decoded only once
+        qr_code_data = b"data:image/png;base64," + pybase64.b64encode(png_view)
+    img_bytes.close()
+    return qr_code_data.decode('ascii')
 
 
 def qr_code_request(request):
@@ -29,17 +70,14 @@ def qr_code_request(request):
             back_color = form.cleaned_data['back_color']
             transparent_background = form.cleaned_data['transparent_background']
             is_google_drive_link = form.cleaned_data.get('is_google_drive_link', False)
+            mask_pattern = form.cleaned_data.get('mask_pattern')
+            output_format = form.cleaned_data.get('output_format', 'png')
             
             if is_google_drive_link:
                 data = modify_google_drive_url(data)
 
             # Create the QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=size,
-                border=border,
-            )
+            qr = new_qr_code(size, border, mask_pattern)
             qr.add_data(data)
             qr.make(fit=True)
 
@@ -47,22 +85,16 @@ def qr_code_request(request):
             if transparent_background:
                 back_color = None
 
-            img = qr.make_image(fill_color=fill_color, back_color=back_color)
-
-            # Save QR code to a BytesIO object
-            img_bytes = BytesIO()
-            img.save(img_bytes, format='PNG')
-            # Instead of returning a downloadable response, embed the image in base64
-            img_bytes.seek(0)
-            base64_image = base64.b64encode(img_bytes.getvalue()).decode('utf-8')
-            img_bytes.close()
-
-            # Embed the base64 image in the context
-            qr_code_data = f"data:image/png;base64,{base64_image}"
+            if output_format == 'svg':
+                # SVG skips the PNG encode and base64 entirely and is usually much smaller
+                svg = render_svg(qr.get_matrix(), size, fill_color, back_color)
+                qr_code_data = "data:image/svg+xml;charset=utf-8," + quote(svg)
+            else:
+                qr_code_data = render_png_data_uri(qr, size, fill_color, back_color)
 
             return render(request, 'qrapp/qr_form.html', {
                 'form': form,
-                'qr_code_data': qr_code_data,  # Pass the base64 image data to the template
+                'qr_code_data': qr_code_data,  # Pass the image data URI to the template
             })
     else:
         form = QRCodeForm()